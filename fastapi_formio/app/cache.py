@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+# Caches are per process. update_form/delete_form invalidate them in the worker
+# that handled the change; the endpoints also compare each entry against the
+# form's stored updated_at before serving it, so changes made through other
+# workers are picked up on the next request.
+MAX_CACHED_FORMS = 1024
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, maxsize=MAX_CACHED_FORMS):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+
+# form_id -> (updated_at, serialized GET /api/forms/{form_id} body, headers)
+form_json_cache = LRUCache()
+
+# form_id -> (updated_at, rendered GET /forms/{form_id} page, headers)
+form_page_cache = LRUCache()
+
+# form_id -> number of invalidations, used to discard responses built from rows
+# that were read before a concurrent update or delete
+_generations = {}
+
+
+def form_generation(form_id):
+    """Return the form's cache generation; read it before loading the form"""
+    return _generations.get(form_id, 0)
+
+
+def cache_form_response(cache, form_id, generation, value):
+    """Store a response unless the form was invalidated since `generation` was read"""
+    if _generations.get(form_id, 0) == generation:
+        cache.set(form_id, value)
+
+
+def invalidate_form(form_id):
+    """Drop every cached response for a form after it is updated or deleted"""
+    _generations[form_id] = _generations.get(form_id, 0) + 1
+    form_json_cache.pop(form_id)
+    form_page_cache.pop(form_id)
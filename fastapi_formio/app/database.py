@@ -1,11 +1,5 @@
-from sqlalchemy.orm import sessionmaker
-from .models import engine
+from .models import SessionLocal
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
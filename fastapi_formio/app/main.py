@@ -1,21 +1,39 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, Body
+from fastapi import FastAPI, Depends, HTTPException, Request, Body, BackgroundTasks, Path
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete
+from sqlalchemy.engine import Row, RowMapping
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import functools
+import hashlib
+from jinja2 import FileSystemBytecodeCache
 import json
 from pydantic import BaseModel, Field, EmailStr
-from datetime import datetime
-import smtplib
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+import os
+import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
-import traceback
+import fastjsonschema
+import orjson
 
 from . import models
+from .validation import get_validator, invalidate_validator
+from .cache import form_json_cache, form_page_cache, form_generation, cache_form_response, invalidate_form
 from .database import get_db
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.routing import APIRoute
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.dependencies.utils import get_typed_return_annotation
+from fastapi.utils import lenient_issubclass
+from starlette.concurrency import run_in_threadpool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,13 +53,107 @@ class EmailRequest(BaseModel):
     subject: Optional[str] = "Form to fill"
     message: Optional[str] = "Please fill out this form"
 
-app = FastAPI(title="FastAPI Form.io Builder", version="1.0.0")
+# Development mode: reload edited templates and skip the rendered page cache
+DEBUG = os.getenv("DEBUG", "").strip().lower() in ("1", "true", "yes", "on")
 
-# Add CORS middleware
+# SMTP settings; emails are only logged when SMTP_HOST is unset
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_FROM = os.getenv("SMTP_FROM", "your-email@example.com")
+
+# Comma-separated list of origins allowed to call the API
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+
+# Rows fetched per round-trip when streaming submissions
+SUBMISSIONS_BATCH_SIZE = 500
+
+def _is_foreign_key_violation(error: IntegrityError) -> bool:
+    """Check whether an IntegrityError was raised by a foreign key constraint"""
+    # SQLSTATE 23503 on PostgreSQL; SQLite only reports it in the message
+    if getattr(error.orig, "sqlstate", None) == "23503" or getattr(error.orig, "pgcode", None) == "23503":
+        return True
+    return "FOREIGN KEY constraint failed" in str(error.orig)
+
+def _orjson_default(obj):
+    """Encode SQLAlchemy result rows, which orjson does not know natively"""
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    raise TypeError
+
+class ORJSONRoute(APIRoute):
+    """Route that encodes plain return values straight to bytes with orjson,
+    skipping FastAPI's jsonable_encoder pass; Response objects pass through.
+    Routes with an explicit response_class or response_model keep FastAPI's
+    own serialization"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        response_model = kwargs.get("response_model", Default(None))
+        if isinstance(response_model, DefaultPlaceholder):
+            # FastAPI infers the response model from the return annotation
+            response_model = get_typed_return_annotation(endpoint)
+            if lenient_issubclass(response_model, Response):
+                response_model = None
+        response_class = kwargs.get("response_class", Default(None))
+        # The router hands over the app's default_response_class resolved, so
+        # ORJSONResponse counts as unset: it encodes to the same bytes
+        uses_default_class = isinstance(response_class, DefaultPlaceholder) or response_class is ORJSONResponse
+        if uses_default_class and response_model is None:
+            endpoint = self._encode_with_orjson(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _encode_with_orjson(endpoint, status_code: int):
+        is_coroutine = asyncio.iscoroutinefunction(endpoint)
+
+        @functools.wraps(endpoint)
+        async def encode_response(*args, **kw):
+            if is_coroutine:
+                content = await endpoint(*args, **kw)
+            else:
+                # Sync endpoints must not block the event loop
+                content = await run_in_threadpool(endpoint, *args, **kw)
+            if isinstance(content, Response):
+                return content
+            return Response(
+                content=orjson.dumps(content, default=_orjson_default),
+                status_code=status_code,
+                media_type="application/json"
+            )
+
+        return encode_response
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker process, after import and before serving requests
+    try:
+        app.state.default_tenant_id = await models.init_db()
+        for name in PRELOADED_TEMPLATES:
+            templates.get_template(name)
+        app.state.form_page_version = _template_version(FORM_PAGE_TEMPLATES)
+        yield
+    finally:
+        # Close pooled connections so their aiosqlite worker threads exit
+        await models.engine.dispose()
+
+app = FastAPI(
+    title="FastAPI Form.io Builder",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+app.router.route_class = ORJSONRoute
+
+# Add CORS middleware. The API uses no cookies, so credentials stay disabled
+# and a wildcard origin is answered with a constant header instead of being
+# echoed back per request.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=CORS_ORIGINS,
+    allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -50,62 +162,124 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-@app.get("/api/debug/database")
-async def debug_database(db: Session = Depends(get_db)):
+# Persist compiled template bytecode across worker restarts; only watch for
+# template edits in development
+templates.env.bytecode_cache = FileSystemBytecodeCache(os.getenv("JINJA_CACHE_DIR"))
+templates.env.auto_reload = DEBUG
+
+# Templates compiled at startup so the first request skips parsing. Later
+# get_template() calls are cache lookups, and re-check the file when DEBUG is set
+PRELOADED_TEMPLATES = ("index.html", "builder.html", "form.html", "email.html")
+
+# Templates a rendered form page is built from; their version is part of the
+# page's validators
+FORM_PAGE_TEMPLATES = ("form.html", "base.html")
+
+def _template_version(names):
+    """Fingerprint and latest mtime of template sources, read once at startup
+    (templates are only reloaded when DEBUG is set, and then pages are not cached)"""
+    digest = hashlib.sha256()
+    modified = 0.0
+    for name in names:
+        source, filename, _ = templates.env.loader.get_source(templates.env, name)
+        digest.update(source.encode())
+        if filename:
+            modified = max(modified, os.path.getmtime(filename))
+    return digest.hexdigest()[:12], modified
+
+def _form_cache_headers(form, template_version=None):
+    """Build the validator headers for responses derived from a form revision and,
+    for rendered pages, the version of their templates"""
+    last_modified = form.updated_at.replace(tzinfo=timezone.utc).timestamp()
+    etag = f"{form.id}-{int(last_modified * 1_000_000)}"
+    if template_version is not None:
+        fingerprint, template_modified = template_version
+        etag = f"{etag}-{fingerprint}"
+        last_modified = max(last_modified, template_modified)
+    return {
+        "ETag": f'W/"{etag}"',
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        # Let clients store the response but revalidate it on every use
+        "Cache-Control": "no-cache",
+    }
+
+async def _form_revision(db: AsyncSession, form_id: int):
+    """Read only a form's updated_at, or None if it no longer exists"""
+    return (await db.execute(
+        select(models.Form.updated_at).where(models.Form.id == form_id)
+    )).scalar_one_or_none()
+
+def _is_not_modified(request: Request, headers: dict) -> bool:
+    """Check the request's conditional headers against a form's validators"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = [tag.strip() for tag in if_none_match.split(",")]
+        return headers["ETag"] in etags or "*" in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+@app.get("/api/debug/database", response_model=None)
+async def debug_database(request: Request, db: AsyncSession = Depends(get_db)):
     try:
         # Check tenants
-        tenants = db.query(models.Tenant).all()
+        tenants = (await db.execute(select(models.Tenant))).scalars().all()
         tenant_info = [{"id": t.id, "name": t.name, "domain": t.domain} for t in tenants]
         
         # Check forms
-        forms = db.query(models.Form).all()
+        forms = (await db.execute(select(models.Form))).scalars().all()
         form_info = [{"id": f.id, "title": f.title, "tenant_id": f.tenant_id} for f in forms]
         
         result = {
-            "default_tenant_id": models.DEFAULT_TENANT_ID,
+            "default_tenant_id": request.app.state.default_tenant_id,
             "tenants": tenant_info,
             "forms": form_info,
             "database_url": models.SQLALCHEMY_DATABASE_URL
         }
-        logger.info(f"Database debug info: {result}")
-        return result
+        logger.info("Database debug info: %s", result)
+        return ORJSONResponse(content=result)
     except Exception as e:
-        logger.error(f"Database debug error: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Database debug error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # API Routes
-@app.post("/api/forms/")
-async def create_form(form_data: FormCreate, db: Session = Depends(get_db)):
+@app.post("/api/forms/", response_model=None)
+async def create_form(request: Request, form_data: FormCreate, db: AsyncSession = Depends(get_db)):
     try:
-        logger.info(f"Creating form with title: {form_data.title}")
+        logger.info("Creating form with title: %s", form_data.title)
         
         # Check if default tenant is available
-        if models.DEFAULT_TENANT_ID is None:
+        default_tenant_id = request.app.state.default_tenant_id
+        if default_tenant_id is None:
             logger.error("Default tenant not available")
             raise HTTPException(status_code=500, detail="Default tenant not initialized")
         
-        # Verify tenant exists
-        tenant = db.query(models.Tenant).filter(models.Tenant.id == models.DEFAULT_TENANT_ID).first()
-        if not tenant:
-            logger.error(f"Default tenant with ID {models.DEFAULT_TENANT_ID} not found")
-            raise HTTPException(status_code=500, detail="Default tenant not found")
-        
-        logger.info(f"Using tenant: {tenant.name} (ID: {tenant.id})")
-        
         form = models.Form(
-            tenant_id=models.DEFAULT_TENANT_ID,
+            tenant_id=default_tenant_id,
             title=form_data.title,
             description=form_data.description,
             schema=form_data.schema
         )
         db.add(form)
-        db.commit()
-        db.refresh(form)
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            # The tenant foreign key is the only foreign key on a new form; any other
+            # violation falls through to the generic error handler below
+            if not _is_foreign_key_violation(e):
+                raise
+            logger.exception("Default tenant with ID %s not found", default_tenant_id)
+            raise HTTPException(status_code=500, detail="Default tenant not found")
         
-        logger.info(f"Form created successfully with ID: {form.id}")
+        logger.info("Form created successfully with ID: %s", form.id)
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=201,
             content={
                 "id": form.id,
@@ -117,116 +291,147 @@ async def create_form(form_data: FormCreate, db: Session = Depends(get_db)):
             }
         )
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error creating form: {str(e)}")
-        logger.error(traceback.format_exc())
+        await db.rollback()
+        logger.exception("Error creating form: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.put("/api/forms/{form_id}")
-async def update_form(form_id: str, form_data: FormCreate, db: Session = Depends(get_db)):
+@app.put("/api/forms/{form_id}", response_model=None)
+async def update_form(form_data: FormCreate, form_id: int = Path(..., ge=1), db: AsyncSession = Depends(get_db)):
     try:
-        logger.info(f"Updating form with ID: {form_id}")
+        logger.info("Updating form with ID: %s", form_id)
         
-        form = db.query(models.Form).filter(models.Form.id == form_id).first()
-        if not form:
-            logger.warning(f"Form with ID {form_id} not found for update")
+        result = await db.execute(
+            update(models.Form)
+            .where(models.Form.id == form_id)
+            .values(
+                title=form_data.title,
+                description=form_data.description,
+                schema=form_data.schema
+            )
+            .returning(models.Form.id, models.Form.created_at, models.Form.updated_at, models.Form.tenant_id)
+        )
+        row = result.first()
+        if row is None:
+            logger.warning("Form with ID %s not found for update", form_id)
             raise HTTPException(status_code=404, detail="Form not found")
-        
-        # Update form fields
-        form.title = form_data.title
-        form.description = form_data.description
-        form.schema = form_data.schema
-        
-        db.commit()
-        db.refresh(form)
-        
-        logger.info(f"Form updated successfully with ID: {form.id}")
-        
-        return JSONResponse(
+
+        await db.commit()
+        invalidate_validator(row.id)
+        invalidate_form(row.id)
+
+        logger.info("Form updated successfully with ID: %s", row.id)
+
+        return ORJSONResponse(
             status_code=200,
             content={
-                "id": form.id,
-                "title": form.title,
-                "description": form.description,
-                "schema": form.schema,
-                "created_at": form.created_at.isoformat(),
-                "updated_at": form.updated_at.isoformat(),
-                "tenant_id": form.tenant_id
+                "id": row.id,
+                "title": form_data.title,
+                "description": form_data.description,
+                "schema": form_data.schema,
+                "created_at": row.created_at.isoformat(),
+                "updated_at": row.updated_at.isoformat(),
+                "tenant_id": row.tenant_id
             }
         )
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error updating form {form_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        await db.rollback()
+        logger.exception("Error updating form %s: %s", form_id, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.get("/api/forms/")
-async def list_forms(db: Session = Depends(get_db)):
+@app.get("/api/forms/", response_model=None)
+async def list_forms(db: AsyncSession = Depends(get_db)):
     try:
         logger.info("Listing all forms")
-        forms = db.query(models.Form).all()
-        logger.info(f"Found {len(forms)} forms")
-        return [
-            {
-                "id": form.id,
-                "title": form.title,
-                "description": form.description,
-                "created_at": form.created_at.isoformat(),
-                "tenant_id": form.tenant_id
-            }
-            for form in forms
-        ]
+        # Project only the listed columns so the schema JSON is never loaded
+        result = await db.execute(
+            select(
+                models.Form.id,
+                models.Form.title,
+                models.Form.description,
+                models.Form.created_at,
+                models.Form.tenant_id
+            )
+        )
+        forms = result.all()
+        logger.info("Found %s forms", len(forms))
+        # Rows are encoded directly by ORJSONRoute; orjson emits ISO 8601 datetimes
+        return forms
     except Exception as e:
-        logger.error(f"Error listing forms: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error listing forms: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.get("/api/forms/{form_id}")
-async def get_form(form_id: int, db: Session = Depends(get_db)):
+@app.get("/api/forms/{form_id}", response_model=None)
+async def get_form(request: Request, form_id: int = Path(..., ge=1), db: AsyncSession = Depends(get_db)):
     try:
-        logger.info(f"Getting form with ID: {form_id}")
-        form = db.query(models.Form).filter(models.Form.id == form_id).first()
+        logger.info("Getting form with ID: %s", form_id)
+
+        cached = form_json_cache.get(form_id)
+        # Another worker may have updated or deleted the form, so the cached
+        # entry is only served while it matches the stored revision
+        if cached is not None and cached[0] == await _form_revision(db, form_id):
+            _, content, headers = cached
+            if _is_not_modified(request, headers):
+                return Response(status_code=304, headers=headers)
+            return Response(content=content, media_type="application/json", headers=headers)
+
+        # Read before the SELECT so a concurrent update cannot leave a stale entry behind
+        generation = form_generation(form_id)
+        form = (await db.execute(
+            select(models.Form).where(models.Form.id == form_id)
+        )).scalar_one_or_none()
         if not form:
-            logger.warning(f"Form with ID {form_id} not found")
+            logger.warning("Form with ID %s not found", form_id)
             raise HTTPException(status_code=404, detail="Form not found")
         
-        logger.info(f"Form found: {form.title}")
-        return {
+        logger.info("Form found: %s", form.title)
+        content = orjson.dumps({
             "id": form.id,
             "title": form.title,
             "description": form.description,
             "schema": form.schema,
             "created_at": form.created_at.isoformat(),
             "tenant_id": form.tenant_id
-        }
+        })
+        headers = _form_cache_headers(form)
+        cache_form_response(form_json_cache, form_id, generation, (form.updated_at, content, headers))
+        if _is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+        return Response(content=content, media_type="application/json", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting form {form_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error getting form %s: %s", form_id, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.post("/api/forms/{form_id}/submit")
+@app.post("/api/forms/{form_id}/submit", response_model=None)
 async def submit_form(
-    form_id: int,
     submission: FormSubmission,
-    db: Session = Depends(get_db)
+    form_id: int = Path(..., ge=1),
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        logger.info(f"Submitting form {form_id}")
+        logger.info("Submitting form %s", form_id)
         
-        form = db.query(models.Form).filter(models.Form.id == form_id).first()
+        form = (await db.execute(
+            select(models.Form).where(models.Form.id == form_id)
+        )).scalar_one_or_none()
         if not form:
-            logger.warning(f"Form with ID {form_id} not found for submission")
+            logger.warning("Form with ID %s not found for submission", form_id)
             raise HTTPException(status_code=404, detail="Form not found")
         
-        logger.info(f"Form found: {form.title}, tenant_id: {form.tenant_id}")
+        logger.info("Form found: %s, tenant_id: %s", form.title, form.tenant_id)
+
+        try:
+            get_validator(form)(submission.data)
+        except fastjsonschema.JsonSchemaValueException as e:
+            logger.warning("Invalid submission for form %s: %s", form_id, e)
+            raise HTTPException(status_code=422, detail=f"Invalid submission: {str(e)}")
         
         form_submission = models.FormSubmission(
             form_id=form_id,
@@ -234,12 +439,11 @@ async def submit_form(
             data=submission.data
         )
         db.add(form_submission)
-        db.commit()
-        db.refresh(form_submission)
+        await db.commit()
         
-        logger.info(f"Form submission created with ID: {form_submission.id}")
+        logger.info("Form submission created with ID: %s", form_submission.id)
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=201,
             content={
                 "id": form_submission.id,
@@ -250,122 +454,166 @@ async def submit_form(
             }
         )
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error submitting form {form_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        await db.rollback()
+        logger.exception("Error submitting form %s: %s", form_id, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.get("/api/forms/{form_id}/submissions")
-async def get_form_submissions(form_id: int, db: Session = Depends(get_db)):
+async def _stream_submissions(form_id: int, first_partition, partitions, result, ndjson: bool):
+    """Yield submissions as NDJSON lines or as chunks of one JSON array, a batch at a time"""
+    # The session from get_db stays open until the response has been sent
+    separator = b"\n" if ndjson else b","
+    count = 0
     try:
-        logger.info(f"Getting submissions for form {form_id}")
-        
-        form = db.query(models.Form).filter(models.Form.id == form_id).first()
-        if not form:
-            logger.warning(f"Form with ID {form_id} not found")
-            raise HTTPException(status_code=404, detail="Form not found")
-        
-        submissions = db.query(models.FormSubmission).filter(
-            models.FormSubmission.form_id == form_id
-        ).all()
-        
-        logger.info(f"Found {len(submissions)} submissions for form {form_id}")
+        if first_partition:
+            chunk = separator.join(orjson.dumps(row._asdict()) for row in first_partition)
+            yield chunk if ndjson else b"[" + chunk
+            count += len(first_partition)
+            async for partition in partitions:
+                yield b"".join(separator + orjson.dumps(row._asdict()) for row in partition)
+                count += len(partition)
+            yield b"\n" if ndjson else b"]"
+        elif not ndjson:
+            yield b"[]"
+        logger.info("Streamed %s submissions for form %s", count, form_id)
+    except Exception as e:
+        logger.exception("Error streaming submissions for form %s: %s", form_id, e)
+        raise
+    finally:
+        await result.close()
+
+@app.get("/api/forms/{form_id}/submissions", response_model=None)
+async def get_form_submissions(request: Request, form_id: int = Path(..., ge=1), db: AsyncSession = Depends(get_db)):
+    try:
+        logger.info("Getting submissions for form %s", form_id)
         
-        return [
-            {
-                "id": sub.id,
-                "data": sub.data,
-                "submitted_at": sub.submitted_at.isoformat(),
-                "tenant_id": sub.tenant_id
-            }
-            for sub in submissions
-        ]
+        result = await db.stream(
+            select(
+                models.FormSubmission.id,
+                models.FormSubmission.data,
+                models.FormSubmission.submitted_at,
+                models.FormSubmission.tenant_id
+            )
+            .where(models.FormSubmission.form_id == form_id)
+            .execution_options(yield_per=SUBMISSIONS_BATCH_SIZE)
+        )
+        partitions = result.partitions()
+        first_partition = await anext(partitions, None)
+
+        # Only an empty result needs the existence check to tell 404 from no submissions
+        if first_partition is None:
+            await result.close()
+            form_exists = (await db.execute(
+                select(models.Form.id).where(models.Form.id == form_id)
+            )).first()
+            if form_exists is None:
+                logger.warning("Form with ID %s not found", form_id)
+                raise HTTPException(status_code=404, detail="Form not found")
+
+        ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+        return StreamingResponse(
+            _stream_submissions(form_id, first_partition, partitions, result, ndjson),
+            media_type="application/x-ndjson" if ndjson else "application/json"
+        )
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting submissions for form {form_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error getting submissions for form %s: %s", form_id, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.delete("/api/forms/{form_id}")
-async def delete_form(form_id: int, db: Session = Depends(get_db)):
+@app.delete("/api/forms/{form_id}", response_model=None)
+async def delete_form(form_id: int = Path(..., ge=1), db: AsyncSession = Depends(get_db)):
     try:
-        logger.info(f"Deleting form {form_id}")
+        logger.info("Deleting form %s", form_id)
         
-        form = db.query(models.Form).filter(models.Form.id == form_id).first()
-        if not form:
-            logger.warning(f"Form with ID {form_id} not found for deletion")
+        result = await db.execute(
+            delete(models.Form)
+            .where(models.Form.id == form_id)
+            .returning(models.Form.id)
+        )
+        if result.first() is None:
+            logger.warning("Form with ID %s not found for deletion", form_id)
             raise HTTPException(status_code=404, detail="Form not found")
-        
-        logger.info(f"Deleting form: {form.title}")
-        db.delete(form)
-        db.commit()
-        
-        logger.info(f"Form {form_id} deleted successfully")
-        return JSONResponse(
+
+        await db.commit()
+        invalidate_validator(form_id)
+        invalidate_form(form_id)
+
+        logger.info("Form %s deleted successfully", form_id)
+        return ORJSONResponse(
             status_code=200,
             content={"message": "Form deleted successfully"}
         )
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error deleting form {form_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        await db.rollback()
+        logger.exception("Error deleting form %s: %s", form_id, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.post("/api/forms/{form_id}/send-email")
+async def _send_form_email(to_email: str, subject: str, form_title: str, message: str, form_url: str):
+    """Build the form invitation email and deliver it over SMTP (runs as a background task)"""
+    try:
+        # Create email content
+        # Autoescaping covers the user-supplied title and message
+        email_content = templates.get_template("email.html").render(title=form_title, message=message, url=form_url)
+
+        # Create message
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = SMTP_FROM
+        msg['To'] = to_email
+
+        # Add HTML content
+        msg.attach(MIMEText(email_content, 'html'))
+
+        if not SMTP_HOST:
+            logger.info("Email prepared for %s (SMTP not configured)", to_email)
+            return
+
+        async with aiosmtplib.SMTP(hostname=SMTP_HOST, port=SMTP_PORT, start_tls=True) as smtp:
+            if SMTP_USERNAME:
+                await smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+            await smtp.send_message(msg)
+
+        logger.info("Email sent to %s", to_email)
+    except Exception as e:
+        logger.exception("Error sending email to %s: %s", to_email, e)
+
+@app.post("/api/forms/{form_id}/send-email", response_model=None)
 async def send_form_email(
-    form_id: int,
     email_request: EmailRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    form_id: int = Path(..., ge=1),
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        logger.info(f"Sending email for form {form_id} to {email_request.email}")
+        logger.info("Sending email for form %s to %s", form_id, email_request.email)
         
-        form = db.query(models.Form).filter(models.Form.id == form_id).first()
-        if not form:
-            logger.warning(f"Form with ID {form_id} not found for email sending")
+        form_title = (await db.execute(
+            select(models.Form.title).where(models.Form.id == form_id)
+        )).scalar_one_or_none()
+        if form_title is None:
+            logger.warning("Form with ID %s not found for email sending", form_id)
             raise HTTPException(status_code=404, detail="Form not found")
 
         # Generate the form URL
         form_url = f"http://localhost:5000/forms/{form_id}"
 
-        # Create email content
-        email_content = f"""
-        <html>
-            <body>
-                <h2>Form: {form.title}</h2>
-                <p>{email_request.message}</p>
-                <p>Please click the link below to fill out the form:</p>
-                <a href="{form_url}">{form_url}</a>
-            </body>
-        </html>
-        """
-
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = email_request.subject
-        msg['From'] = "your-email@example.com"  # Replace with your email
-        msg['To'] = email_request.email
-        
-        # Add HTML content
-        msg.attach(MIMEText(email_content, 'html'))
-
-        # TODO: Configure your SMTP settings
-        # smtp_server = smtplib.SMTP('smtp.gmail.com', 587)
-        # smtp_server.starttls()
-        # smtp_server.login('your-email@example.com', 'your-password')
-        # smtp_server.send_message(msg)
-        # smtp_server.quit()
-
-        logger.info(f"Email prepared for {email_request.email} (SMTP not configured)")
+        # Assemble and send the email after the response has been returned
+        background_tasks.add_task(
+            _send_form_email,
+            email_request.email,
+            email_request.subject,
+            form_title,
+            email_request.message,
+            form_url
+        )
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=200,
             content={
                 "message": f"Form link sent to {email_request.email}",
@@ -375,8 +623,7 @@ async def send_form_email(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error sending email for form {form_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error sending email for form %s: %s", form_id, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 # Frontend Routes
@@ -389,15 +636,17 @@ async def form_builder(request: Request):
     return templates.TemplateResponse("builder.html", {"request": request})
 
 @app.get("/builder/{form_id}", response_class=HTMLResponse)
-async def edit_form_builder(request: Request, form_id: str, db: Session = Depends(get_db)):
+async def edit_form_builder(request: Request, form_id: int = Path(..., ge=1), db: AsyncSession = Depends(get_db)):
     try:
-        logger.info(f"Loading form builder for editing form {form_id}")
-        form = db.query(models.Form).filter(models.Form.id == form_id).first()
+        logger.info("Loading form builder for editing form %s", form_id)
+        form = (await db.execute(
+            select(models.Form).where(models.Form.id == form_id)
+        )).scalar_one_or_none()
         if not form:
-            logger.warning(f"Form with ID {form_id} not found for editing")
+            logger.warning("Form with ID %s not found for editing", form_id)
             raise HTTPException(status_code=404, detail="Form not found")
         
-        logger.info(f"Loading form for editing: {form.title}")
+        logger.info("Loading form for editing: %s", form.title)
         return templates.TemplateResponse(
             "builder.html",
             {"request": request, "form": form, "is_edit": True}
@@ -405,27 +654,42 @@ async def edit_form_builder(request: Request, form_id: str, db: Session = Depend
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error loading form builder for form {form_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error loading form builder for form %s: %s", form_id, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.get("/forms/{form_id}", response_class=HTMLResponse)
-async def render_form(request: Request, form_id: int, db: Session = Depends(get_db)):
+async def render_form(request: Request, form_id: int = Path(..., ge=1), db: AsyncSession = Depends(get_db)):
     try:
-        logger.info(f"Rendering form {form_id}")
-        form = db.query(models.Form).filter(models.Form.id == form_id).first()
+        logger.info("Rendering form %s", form_id)
+
+        cached = None if DEBUG else form_page_cache.get(form_id)
+        # Served only while it matches the stored revision, as in get_form
+        if cached is not None and cached[0] == await _form_revision(db, form_id):
+            _, content, headers = cached
+            if _is_not_modified(request, headers):
+                return Response(status_code=304, headers=headers)
+            return HTMLResponse(content=content, headers=headers)
+
+        # Read before the SELECT so a concurrent update cannot leave a stale entry behind
+        generation = form_generation(form_id)
+        form = (await db.execute(
+            select(models.Form).where(models.Form.id == form_id)
+        )).scalar_one_or_none()
         if not form:
-            logger.warning(f"Form with ID {form_id} not found for rendering")
+            logger.warning("Form with ID %s not found for rendering", form_id)
             raise HTTPException(status_code=404, detail="Form not found")
         
-        logger.info(f"Rendering form: {form.title}")
-        return templates.TemplateResponse(
-            "form.html",
-            {"request": request, "form": form}
-        )
+        logger.info("Rendering form: %s", form.title)
+        # Rendered directly so the page can be cached as bytes
+        content = templates.get_template("form.html").render(request=request, form=form).encode()
+        headers = _form_cache_headers(form, request.app.state.form_page_version)
+        if not DEBUG:
+            cache_form_response(form_page_cache, form_id, generation, (form.updated_at, content, headers))
+        if not DEBUG and _is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(content=content, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error rendering form {form_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error rendering form %s: %s", form_id, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}") 
\ No newline at end of file
@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, create_engine, Index
+from sqlalchemy import event, inspect, MetaData, Column, Integer, String, JSON, DateTime, ForeignKey, Index, select, make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
-from datetime import datetime
-import json
+from sqlalchemy.orm import relationship
+from sqlalchemy.schema import CreateTable, DropTable
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+import orjson
 import os
 import logging
 
@@ -12,14 +17,39 @@ logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+class utcnow(FunctionElement):
+    """Current UTC timestamp evaluated by the database"""
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+@compiles(utcnow, "sqlite")
+def _sqlite_utcnow(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has second precision on SQLite; form revisions need finer
+    return "(STRFTIME('%Y-%m-%d %H:%M:%f', 'now'))"
+
+# Relationships use lazy="raise" so accidental attribute access cannot issue
+# hidden per-row queries; load them explicitly with selectinload()/joinedload().
+# Timestamps are generated by the database; eager_defaults fetches them back
+# with INSERT ... RETURNING instead of a follow-up SELECT.
+
 class Tenant(Base):
     __tablename__ = "tenants"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     domain = Column(String, unique=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    forms = relationship("Form", back_populates="tenant", cascade="all, delete-orphan")
+    created_at = Column(DateTime, server_default=utcnow(), nullable=False)
+    forms = relationship("Form", back_populates="tenant", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
+
+    __mapper_args__ = {"eager_defaults": True}
 
     def __repr__(self):
         return f"<Tenant(id={self.id}, name='{self.name}')>"
@@ -32,15 +62,18 @@ class Form(Base):
     title = Column(String, index=True, nullable=False)
     description = Column(String, nullable=True)
     schema = Column(JSON, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    submissions = relationship("FormSubmission", back_populates="form", cascade="all, delete-orphan")
-    tenant = relationship("Tenant", back_populates="forms")
+    created_at = Column(DateTime, server_default=utcnow(), nullable=False)
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow(), nullable=False)
+    submissions = relationship("FormSubmission", back_populates="form", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
+    tenant = relationship("Tenant", back_populates="forms", lazy="raise")
 
     __table_args__ = (
         Index('idx_tenant_form', 'tenant_id', 'id'),
+        Index('idx_form_updated_at', 'updated_at'),
     )
 
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         return f"<Form(id={self.id}, title='{self.title}')>"
 
@@ -51,42 +84,63 @@ class FormSubmission(Base):
     form_id = Column(Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False)
     tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
     data = Column(JSON, nullable=False)
-    submitted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    form = relationship("Form", back_populates="submissions")
-    tenant = relationship("Tenant")
+    submitted_at = Column(DateTime, server_default=utcnow(), nullable=False)
+    form = relationship("Form", back_populates="submissions", lazy="raise")
+    tenant = relationship("Tenant", lazy="raise")
 
     __table_args__ = (
         Index('idx_tenant_submission', 'tenant_id', 'form_id', 'submitted_at'),
     )
 
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         return f"<FormSubmission(id={self.id}, form_id={self.form_id})>"
 
-# Create SQLite database engine
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/formio.db")
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False},
-    json_serializer=lambda obj: json.dumps(obj, ensure_ascii=False),
-    json_deserializer=lambda obj: json.loads(obj)
+# Create async SQLite database engine
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./data/formio.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", os.cpu_count() or 4))
+
+engine_options = {}
+database_url = make_url(SQLALCHEMY_DATABASE_URL)
+if database_url.get_backend_name() == "sqlite" and database_url.database not in (None, "", ":memory:"):
+    # aiosqlite defaults to NullPool for file databases, opening a new connection per request
+    engine_options.update(poolclass=AsyncAdaptedQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_POOL_SIZE)
+
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_pre_ping=True,
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+    **engine_options
 )
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # SQLite ignores ON DELETE CASCADE unless foreign keys are enabled per connection
+        cursor.execute("PRAGMA foreign_keys=ON")
+        # WAL lets readers proceed concurrently with a single writer
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.close()
 
-# Create session for initialization
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create session factory
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
 
-def get_or_create_default_tenant():
+async def get_or_create_default_tenant(session):
     """Get or create the default tenant for single-tenant usage"""
     try:
-        session = SessionLocal()
-        
         # Check if default tenant exists
-        default_tenant = session.query(Tenant).filter(
-            Tenant.name == "Default Tenant"
-        ).first()
-        
+        result = await session.execute(
+            select(Tenant).where(Tenant.name == "Default Tenant")
+        )
+        default_tenant = result.scalars().first()
+
         if not default_tenant:
             logger.info("Creating default tenant...")
             default_tenant = Tenant(
@@ -94,25 +148,120 @@ def get_or_create_default_tenant():
                 domain="localhost"
             )
             session.add(default_tenant)
-            session.commit()
-            session.refresh(default_tenant)
-            logger.info(f"Default tenant created with ID: {default_tenant.id}")
-        
-        tenant_id = default_tenant.id
-        session.close()
-        return tenant_id
-        
+            try:
+                await session.commit()
+                logger.info("Default tenant created with ID: %s", default_tenant.id)
+            except IntegrityError:
+                # Another worker created it between our SELECT and INSERT
+                await session.rollback()
+                result = await session.execute(
+                    select(Tenant).where(Tenant.name == "Default Tenant")
+                )
+                default_tenant = result.scalars().first()
+                if not default_tenant:
+                    raise
+                logger.info("Default tenant created concurrently with ID: %s", default_tenant.id)
+
+        return default_tenant.id
+
     except Exception as e:
-        logger.error(f"Error creating/getting default tenant: {str(e)}")
-        if 'session' in locals():
-            session.rollback()
-            session.close()
+        logger.error("Error creating/getting default tenant: %s", e)
+        await session.rollback()
         raise
 
-# Initialize default tenant on module import
-try:
-    DEFAULT_TENANT_ID = get_or_create_default_tenant()
-    logger.info(f"Using default tenant ID: {DEFAULT_TENANT_ID}")
-except Exception as e:
-    logger.error(f"Failed to initialize default tenant: {str(e)}")
-    DEFAULT_TENANT_ID = None 
\ No newline at end of file
+def find_missing_server_defaults(connection):
+    """List columns that the models expect the database to fill in but whose
+    existing table has no default (databases created before server-side timestamps)"""
+    inspector = inspect(connection)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        reflected = {column["name"]: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.server_default is None:
+                continue
+            if reflected.get(column.name, {}).get("default") is None:
+                missing.append(f"{table.name}.{column.name}")
+    return missing
+
+def _rebuild_sqlite_table(connection, table):
+    """Recreate a table from its model under a staging name, copy its rows across,
+    then swap it in for the old table and recreate the model's indexes"""
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    columns = [column.name for column in table.columns if column.name in existing]
+
+    # The staging copy needs the tables it references to compile its foreign keys
+    staging_metadata = MetaData()
+    for referenced in {fk.column.table for fk in table.foreign_keys}:
+        referenced.to_metadata(staging_metadata)
+    staging = table.to_metadata(staging_metadata, name=f"_rebuild_{table.name}")
+
+    # CreateTable leaves out indexes, whose names are still taken by the old table
+    connection.execute(CreateTable(staging))
+    connection.execute(
+        staging.insert().from_select(columns, select(*(table.c[name] for name in columns)))
+    )
+    connection.execute(DropTable(table))
+    preparer = connection.dialect.identifier_preparer
+    connection.exec_driver_sql(
+        f"ALTER TABLE {preparer.format_table(staging)} RENAME TO {preparer.format_table(table)}"
+    )
+    for index in table.indexes:
+        index.create(connection)
+
+def add_missing_sqlite_defaults(connection):
+    """Rebuild the SQLite tables that lack the models' column defaults, keeping their rows.
+
+    SQLite cannot change a column's default in place, so this follows its table
+    rebuild procedure (https://www.sqlite.org/lang_altertable.html#otheralter)
+    with foreign keys disabled, so dropping a parent table does not cascade."""
+    connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    try:
+        # IMMEDIATE takes the write lock up front: workers starting together
+        # rebuild one after another, and the later ones find nothing left to do
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            tables = {name.split(".")[0] for name in find_missing_server_defaults(connection)}
+            for table in Base.metadata.sorted_tables:
+                if table.name in tables:
+                    logger.warning("Rebuilding table %s to add column defaults", table.name)
+                    _rebuild_sqlite_table(connection, table)
+            # Orphaned rows predate the rebuild (older versions ran without
+            # foreign key enforcement), so they are reported but kept
+            orphans = connection.exec_driver_sql("PRAGMA foreign_key_check").all()
+            if orphans:
+                logger.warning("%s rows reference missing parent rows", len(orphans))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    finally:
+        connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+        connection.commit()
+
+async def init_db():
+    """Create all tables and return the default tenant ID (None if it is unavailable)"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        missing_defaults = await conn.run_sync(find_missing_server_defaults)
+
+    if missing_defaults and engine.dialect.name == "sqlite":
+        async with engine.connect() as conn:
+            await conn.run_sync(add_missing_sqlite_defaults)
+            missing_defaults = await conn.run_sync(find_missing_server_defaults)
+
+    # Inserts omit these columns, so every write would fail on such a database
+    if missing_defaults:
+        raise RuntimeError(
+            f"Database {engine.url.render_as_string(hide_password=True)} was created by an older "
+            f"version and lacks defaults for {', '.join(missing_defaults)}. "
+            "Migrate these columns to DEFAULT CURRENT_TIMESTAMP."
+        )
+
+    try:
+        async with SessionLocal() as session:
+            tenant_id = await get_or_create_default_tenant(session)
+        logger.info("Using default tenant ID: %s", tenant_id)
+        return tenant_id
+    except Exception as e:
+        logger.error("Failed to initialize default tenant: %s", e)
+        return None
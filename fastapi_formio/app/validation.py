@@ -0,0 +1,125 @@
+from collections import OrderedDict
+import logging
+
+import fastjsonschema
+
+logger = logging.getLogger(__name__)
+
+# Form.io component types mapped to the JSON type of their submitted value
+COMPONENT_TYPES = {
+    "textfield": "string",
+    "textarea": "string",
+    "email": "string",
+    "phoneNumber": "string",
+    "password": "string",
+    "url": "string",
+    "number": "number",
+    "currency": "number",
+    "checkbox": "boolean",
+}
+
+# Layout components only group other components and do not nest submission data
+LAYOUT_TYPES = {"panel", "fieldset", "well", "columns", "table"}
+
+MAX_CACHED_VALIDATORS = 1024
+
+# form_id -> (updated_at, compiled validator), least recently used first
+_validators = OrderedDict()
+
+
+def _as_dict(value):
+    """Return value if it is a mapping, else an empty dict (guards malformed schemas)"""
+    return value if isinstance(value, dict) else {}
+
+
+def _as_list(value):
+    """Return value if it is a list, else an empty list (guards malformed schemas)"""
+    return value if isinstance(value, list) else []
+
+
+def _is_conditional(component):
+    """Whether Form.io may hide the component (and clear its value) at submit time"""
+    conditional = _as_dict(component.get("conditional"))
+    return bool(
+        conditional.get("show") is not None
+        or conditional.get("when")
+        or conditional.get("json")
+        or conditional.get("conditions")
+        or component.get("customConditional")
+    )
+
+
+def _iter_input_components(components, conditional_ancestor=False):
+    """Yield (component, conditional) for the input components whose values live at
+    the top level of submission data; conditional is set when the component or any
+    layout containing it may be hidden"""
+    for component in _as_list(components):
+        if not isinstance(component, dict):
+            continue
+        conditional = conditional_ancestor or _is_conditional(component)
+        component_type = component.get("type")
+        if component_type == "tabs":
+            # Tab panes are untyped containers listed under the tabs component
+            for pane in _as_list(component.get("components")):
+                if isinstance(pane, dict):
+                    yield from _iter_input_components(pane.get("components"), conditional or _is_conditional(pane))
+        elif component_type in LAYOUT_TYPES:
+            yield from _iter_input_components(component.get("components"), conditional)
+            for column in _as_list(component.get("columns")):
+                yield from _iter_input_components(_as_dict(column).get("components"), conditional)
+            for row in _as_list(component.get("rows")):
+                for cell in _as_list(row):
+                    yield from _iter_input_components(_as_dict(cell).get("components"), conditional)
+        elif component.get("input") and isinstance(component.get("key"), str) and component["key"]:
+            yield component, conditional
+
+
+def build_json_schema(form_schema):
+    """Translate a Form.io form definition into a JSON Schema for its submission data"""
+    properties = {}
+    required = []
+
+    for component, conditional in _iter_input_components(_as_dict(form_schema).get("components")):
+        key = component["key"]
+        json_type = COMPONENT_TYPES.get(component.get("type"))
+        if json_type and not component.get("multiple"):
+            properties[key] = {"type": [json_type, "null"]}
+
+        # Conditionally shown fields may legitimately be absent from the submission
+        if conditional:
+            continue
+        # The same key can appear in several layouts; JSON Schema needs it listed once
+        if _as_dict(component.get("validate")).get("required") and key not in required:
+            required.append(key)
+
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def _accept_any(data):
+    """Validator used when a form's schema cannot be translated or compiled"""
+    return data
+
+
+def get_validator(form):
+    """Return the compiled submission validator for a form, compiling it once per revision"""
+    cached = _validators.get(form.id)
+    if cached is not None and cached[0] == form.updated_at:
+        _validators.move_to_end(form.id)
+        return cached[1]
+
+    logger.info("Compiling submission validator for form %s", form.id)
+    try:
+        validator = fastjsonschema.compile(build_json_schema(form.schema))
+    except Exception as e:
+        # A form definition we cannot translate must not block its submissions
+        logger.exception("Skipping submission validation for form %s: %s", form.id, e)
+        validator = _accept_any
+    _validators[form.id] = (form.updated_at, validator)
+    if len(_validators) > MAX_CACHED_VALIDATORS:
+        _validators.popitem(last=False)
+    return validator
+
+
+def invalidate_validator(form_id):
+    """Drop the cached validator for a form after it is updated or deleted"""
+    _validators.pop(form_id, None)
@@ -0,0 +1,47 @@
+from app.cache import (
+    LRUCache,
+    cache_form_response,
+    form_generation,
+    form_json_cache,
+    form_page_cache,
+    invalidate_form,
+)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get(1) == "a"
+    assert cache.get(2) is None
+    assert cache.get(3) == "c"
+
+
+def test_response_is_cached_when_form_unchanged():
+    generation = form_generation(101)
+    cache_form_response(form_json_cache, 101, generation, b"current")
+
+    assert form_json_cache.get(101) == b"current"
+
+
+def test_invalidate_drops_cached_responses():
+    form_json_cache.set(102, b"json")
+    form_page_cache.set(102, b"page")
+
+    invalidate_form(102)
+
+    assert form_json_cache.get(102) is None
+    assert form_page_cache.get(102) is None
+
+
+def test_response_read_before_invalidation_is_not_cached():
+    for cache in (form_json_cache, form_page_cache):
+        generation = form_generation(103)
+        # A concurrent update commits and invalidates while the reader holds old data
+        invalidate_form(103)
+        cache_form_response(cache, 103, generation, b"stale")
+
+        assert cache.get(103) is None
@@ -0,0 +1,119 @@
+import asyncio
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import (
+    Base,
+    Tenant,
+    add_missing_sqlite_defaults,
+    find_missing_server_defaults,
+    get_or_create_default_tenant,
+)
+
+
+def test_fresh_database_has_all_server_defaults():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+
+        assert find_missing_server_defaults(connection) == []
+
+
+def _create_legacy_tables(connection):
+    # Tables as created before timestamps moved to server-side defaults
+    connection.execute(text(
+        "CREATE TABLE tenants (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, "
+        "domain VARCHAR NOT NULL UNIQUE, created_at DATETIME NOT NULL)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE forms (id INTEGER PRIMARY KEY, tenant_id INTEGER NOT NULL REFERENCES tenants (id), "
+        "title VARCHAR NOT NULL, description VARCHAR, schema JSON NOT NULL, "
+        "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+    ))
+    connection.execute(text("CREATE INDEX idx_tenant_form ON forms (tenant_id, id)"))
+    Base.metadata.create_all(connection)
+
+
+def test_database_without_timestamp_defaults_is_detected():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        _create_legacy_tables(connection)
+
+        assert find_missing_server_defaults(connection) == [
+            "tenants.created_at",
+            "forms.created_at",
+            "forms.updated_at",
+        ]
+
+
+def test_legacy_sqlite_tables_are_rebuilt_with_defaults():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        _create_legacy_tables(connection)
+        connection.execute(text(
+            "INSERT INTO tenants (id, name, domain, created_at) "
+            "VALUES (1, 'Default Tenant', 'localhost', '2024-01-01 00:00:00')"
+        ))
+        connection.execute(text(
+            "INSERT INTO forms (id, tenant_id, title, schema, created_at, updated_at) "
+            "VALUES (7, 1, 'Legacy', '{}', '2024-01-02 00:00:00', '2024-01-03 00:00:00')"
+        ))
+        connection.commit()
+
+        add_missing_sqlite_defaults(connection)
+
+        assert find_missing_server_defaults(connection) == []
+        assert connection.execute(text("SELECT id, title, updated_at FROM forms")).all() == [
+            (7, "Legacy", "2024-01-03 00:00:00")
+        ]
+        # Rows written without timestamps now get them from the database
+        connection.execute(text("INSERT INTO forms (tenant_id, title, schema) VALUES (1, 'New', '{}')"))
+        assert connection.execute(text("SELECT COUNT(*) FROM forms WHERE created_at IS NOT NULL")).scalar() == 2
+        indexes = {index["name"] for index in inspect(connection).get_indexes("forms")}
+        assert {"idx_tenant_form", "idx_form_updated_at"} <= indexes
+
+
+class _RacingSession:
+    """Session proxy that lets another worker insert the default tenant right
+    after our lookup, before our own INSERT is committed"""
+
+    def __init__(self, session, competitor):
+        self._session = session
+        self._competitor = competitor
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    async def execute(self, *args, **kwargs):
+        result = await self._session.execute(*args, **kwargs)
+        if self._competitor is not None:
+            competitor, self._competitor = self._competitor, None
+            await competitor()
+        return result
+
+
+def test_default_tenant_created_concurrently_is_reused(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path}/race.db"
+
+    async def scenario():
+        engine = create_async_engine(url)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+        async def other_worker():
+            async with AsyncSession(engine) as other:
+                other.add(Tenant(name="Default Tenant", domain="localhost"))
+                await other.commit()
+
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                tenant_id = await get_or_create_default_tenant(_RacingSession(session, other_worker))
+            async with engine.connect() as connection:
+                ids = (await connection.execute(text("SELECT id FROM tenants"))).scalars().all()
+        finally:
+            await engine.dispose()
+        return tenant_id, ids
+
+    tenant_id, ids = asyncio.run(scenario())
+    assert ids == [tenant_id]
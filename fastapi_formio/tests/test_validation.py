@@ -0,0 +1,151 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import fastjsonschema
+import pytest
+
+from app import validation
+from app.validation import build_json_schema, get_validator, invalidate_validator
+
+
+def textfield(key, required=False, **extra):
+    return {"type": "textfield", "key": key, "input": True, "validate": {"required": required}, **extra}
+
+
+def validate(form_schema, data):
+    fastjsonschema.compile(build_json_schema(form_schema))(data)
+
+
+def test_top_level_required_field():
+    schema = build_json_schema({"components": [textfield("name", required=True)]})
+
+    assert schema["required"] == ["name"]
+    assert schema["properties"]["name"] == {"type": ["string", "null"]}
+
+
+def test_missing_required_field_is_rejected():
+    with pytest.raises(fastjsonschema.JsonSchemaException):
+        validate({"components": [textfield("name", required=True)]}, {})
+
+
+def test_fields_nested_in_layouts_are_collected():
+    form = {"components": [
+        {"type": "panel", "key": "p", "components": [
+            {"type": "fieldset", "key": "f", "components": [textfield("a", required=True)]},
+        ]},
+        {"type": "columns", "key": "c", "columns": [
+            {"components": [textfield("b", required=True)]},
+            {"components": [{"type": "number", "key": "n", "input": True}]},
+        ]},
+        {"type": "table", "key": "t", "rows": [[{"components": [textfield("d", required=True)]}]]},
+    ]}
+
+    schema = build_json_schema(form)
+
+    assert schema["required"] == ["a", "b", "d"]
+    assert schema["properties"]["n"] == {"type": ["number", "null"]}
+
+
+def test_fields_inside_tabs_are_collected():
+    form = {"components": [
+        {"type": "tabs", "key": "tabs", "components": [
+            {"key": "tab1", "label": "One", "components": [textfield("first", required=True)]},
+            {"key": "tab2", "label": "Two", "components": [{"type": "checkbox", "key": "agree", "input": True}]},
+        ]},
+    ]}
+
+    schema = build_json_schema(form)
+
+    assert schema["required"] == ["first"]
+    assert schema["properties"]["agree"] == {"type": ["boolean", "null"]}
+
+
+def test_conditional_field_is_not_required():
+    field = textfield("detail", required=True, conditional={"show": True, "when": "more", "eq": "true"})
+
+    assert build_json_schema({"components": [field]})["required"] == []
+
+
+def test_default_conditional_does_not_count_as_conditional():
+    field = textfield("name", required=True, conditional={"show": None, "when": None, "eq": ""})
+
+    assert build_json_schema({"components": [field]})["required"] == ["name"]
+
+
+@pytest.mark.parametrize("layout", [
+    {"type": "panel", "key": "p", "components": [textfield("detail", required=True)]},
+    {"type": "fieldset", "key": "f", "components": [textfield("detail", required=True)]},
+    {"type": "columns", "key": "c", "columns": [{"components": [textfield("detail", required=True)]}]},
+])
+def test_required_field_under_conditional_layout_may_be_absent(layout):
+    layout = {**layout, "conditional": {"show": True, "when": "more", "eq": "true"}}
+    form = {"components": [{"type": "checkbox", "key": "more", "input": True}, layout]}
+
+    validate(form, {"more": False})
+
+
+def test_required_field_under_conditional_tab_pane_may_be_absent():
+    form = {"components": [
+        {"type": "tabs", "key": "tabs", "components": [
+            {"key": "tab1", "customConditional": "show = data.more;", "components": [textfield("detail", required=True)]},
+        ]},
+    ]}
+
+    validate(form, {})
+
+
+def test_null_and_empty_values_are_accepted():
+    form = {"components": [
+        textfield("name", required=True),
+        {"type": "number", "key": "age", "input": True},
+        {"type": "checkbox", "key": "agree", "input": True},
+    ]}
+
+    validate(form, {"name": "", "age": None, "agree": None})
+
+
+def test_wrong_value_type_is_rejected():
+    form = {"components": [{"type": "number", "key": "age", "input": True}]}
+
+    with pytest.raises(fastjsonschema.JsonSchemaException):
+        validate(form, {"age": "ten"})
+
+
+def test_multiple_values_are_not_type_checked():
+    form = {"components": [textfield("tags", multiple=True)]}
+
+    validate(form, {"tags": ["a", "b"]})
+
+
+def test_duplicate_required_keys_are_listed_once():
+    form = {"components": [
+        {"type": "panel", "key": "p1", "components": [textfield("name", required=True)]},
+        {"type": "panel", "key": "p2", "components": [textfield("name", required=True)]},
+        textfield("email", required=True),
+    ]}
+
+    assert build_json_schema(form)["required"] == ["name", "email"]
+    validate(form, {"name": "x", "email": "y"})
+
+
+def test_malformed_components_are_ignored():
+    form = {"components": [
+        "not a component",
+        {"type": "tabs", "key": "tabs", "components": ["not a pane", {"components": [textfield("a", required=True)]}]},
+        {"type": "columns", "key": "c", "columns": ["bad", {"components": "bad"}]},
+        {"type": "table", "key": "t", "rows": ["bad", ["bad", {"components": [textfield("b", required=True)]}]]},
+        {"type": "textfield", "key": 5, "input": True},
+        textfield("c", required=True, conditional="bad", validate="bad"),
+    ]}
+
+    assert build_json_schema(form)["required"] == ["a", "b"]
+
+
+def test_uncompilable_schema_skips_validation(monkeypatch):
+    monkeypatch.setattr(validation, "build_json_schema", lambda form_schema: {"type": "no-such-type"})
+    form = SimpleNamespace(id=9001, updated_at=datetime(2024, 1, 1), schema={"components": []})
+
+    try:
+        assert get_validator(form)({"anything": 1}) == {"anything": 1}
+    finally:
+        invalidate_validator(form.id)